@@ -1,28 +1,51 @@
 import os
+import sys
+import json
+import hashlib
+import asyncio
+import threading
 import requests
-from bs4 import BeautifulSoup
-from typing import TypedDict, List
+import httpx
+import aiofiles
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
-from langchain.prompts import PromptTemplate
 from langchain_groq import ChatGroq
-from langchain.schema import HumanMessage
+from langchain.schema import HumanMessage, SystemMessage
+from langchain_core.output_parsers.openai_tools import PydanticToolsParser
+from langchain_core.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
+from langchain_community.embeddings import HuggingFaceEmbeddings
+import faiss
+import numpy as np
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 import re
 from urllib.parse import urlparse
 
 # Load environment variables
 load_dotenv()
 
+# Cache LLM responses on disk so re-running on unchanged content is free
+set_llm_cache(SQLiteCache(database_path=".llm_cache.db"))
+
 # Initialize the ChatGroq instance
+# Temperature 0 and a fixed seed keep the outputs deterministic so cached responses stay valid
 llm = ChatGroq(
     model_name="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0.7
+    temperature=0,
+    model_kwargs={"seed": 42}
 )
 
 # Define the state structure
 class State(TypedDict):
     url: str  # The URL to scrape
     scraped_content: str  # The content scraped from the website
+    analysis_content: str  # The (possibly condensed) content sent to the LLM
     classification: str  # Classification of the content
     summary: str  # Summary of the content
     tags: List[str]  # Popular tags extracted from the content
@@ -33,38 +56,75 @@ class State(TypedDict):
     facts_to_verify: List[str]  # Facts that need verification
     structure: str  # Content structure analysis
 
-def scrape_website(url: str) -> str:
+# Tags whose text is kept when parsing a page
+TEXT_TAG_NAMES = ["p", "h1", "h2", "h3", "li", "article"]
+TEXT_TAGS = SoupStrainer(TEXT_TAG_NAMES)
+
+# Browser-like headers used for every request
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
+# Shared session for scrape_website, reusing keep-alive connections across calls
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+
+# Maximum number of pages fetched at the same time by scrape_many
+MAX_CONCURRENT_REQUESTS = 100
+
+# Collapses whitespace runs, and the block separators inserted while parsing
+_WS_RE = re.compile(r"\s+")
+_BLOCK_RE = re.compile(r" ?\0[\0 ]*")
+
+def _parse_html(html: bytes) -> str:
     """
-    Scrape content from a website and save it to a file.
+    Parse raw HTML and return its cleaned text content.
+    """
+    # Parse the HTML, only building the tags that carry text content
+    soup = BeautifulSoup(html, 'lxml', parse_only=TEXT_TAGS)
+    
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+    
+    # Mark the boundaries of every text tag, so each paragraph, heading or list
+    # item ends up on its own line while inline tags (links, bold, ...) stay in
+    # their sentence. Whitespace inside a block collapses to single spaces.
+    # The markers go inside each block: insert_before/insert_after would look
+    # up the block's position among the parent's children, which is quadratic
+    # since every matched block is a direct child of the soup root.
+    for block in soup.find_all(TEXT_TAG_NAMES):
+        block.insert(0, "\0")
+        block.append("\0")
+    text = _WS_RE.sub(" ", soup.get_text())
+    return _BLOCK_RE.sub("\n", text).strip()
+
+def _output_filename(url: str, out_dir: str) -> str:
+    """
+    Build a per-URL output path, so pages from the same domain don't overwrite each other.
+    """
+    # Readable domain and path, plus a short hash of the full URL to keep it unique
+    parsed = urlparse(url)
+    slug = re.sub(r"[^\w.-]+", "_", f"{parsed.netloc}{parsed.path}").strip("_")[:100]
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(out_dir, f"{slug}_{digest}.txt")
+
+def scrape_website(url: str, save_to_disk: bool = False, out_dir: str = ".") -> str:
+    """
+    Scrape content from a website, optionally saving it to a file in out_dir.
     """
     try:
-        # Get the domain name for the file
-        domain = urlparse(url).netloc
-        filename = f"{domain}.txt"
+        filename = _output_filename(url, out_dir)
         
         # Fetch the webpage
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers)
+        response = SESSION.get(url)
         response.raise_for_status()
         
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Get text content
-        text = soup.get_text()
-        
-        # Clean up the text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+        # Pass the raw bytes so lxml detects the encoding without a decoded str copy
+        text = _parse_html(response.content)
         
         # Save to file
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(text)
+        if save_to_disk:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(text)
         
         return text
     
@@ -72,222 +132,413 @@ def scrape_website(url: str) -> str:
         print(f"Error scraping website: {str(e)}")
         return ""
 
-def classification_node(state: State):
+async def _save_text(filename: str, text: str):
     """
-    Classify the content into predefined categories.
+    Save text to a file without blocking the event loop, in a single write.
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Analyze the following content and classify it into one of these categories: 
-        Technology, Business, Science, Health, Entertainment, Education, or Other.
-        
-        Content: {content}
-        
-        Category:"""
-    )
-
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    classification = llm.invoke([message]).content.strip()
-    return {"classification": classification}
+    try:
+        async with aiofiles.open(filename, 'w', encoding='utf-8') as f:
+            await f.write(text)
+    except Exception as e:
+        print(f"Error saving {filename}: {str(e)}")
 
-def summarize_node(state: State):
+async def scrape_website_async(url: str, client: Optional[httpx.AsyncClient] = None, save_to_disk: bool = False, out_dir: str = ".", pending_writes: Optional[set] = None) -> str:
     """
-    Create a summary of the content.
+    Async version of scrape_website that keeps the event loop free while parsing.
+    Pass a shared client to reuse its connection pool across calls, and a
+    pending_writes set to save the file in the background instead of waiting
+    for it (the caller then has to await those tasks).
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Provide a concise summary of the following content in 2-3 sentences.
+    try:
+        filename = _output_filename(url, out_dir)
+        
+        # Fetch the webpage
+        if client is None:
+            async with httpx.AsyncClient(headers=HEADERS, follow_redirects=True) as client:
+                response = await client.get(url)
+        else:
+            response = await client.get(url)
+        response.raise_for_status()
         
-        Content: {content}
+        # Parsing is CPU-bound, so run it in a worker thread
+        text = await asyncio.to_thread(_parse_html, response.content)
         
-        Summary:"""
-    )
+        # Save to file, in the background when the caller tracks the writes
+        if save_to_disk:
+            if pending_writes is None:
+                await _save_text(filename, text)
+            else:
+                pending_writes.add(asyncio.create_task(_save_text(filename, text)))
+        
+        return text
     
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    summary = llm.invoke([message]).content.strip()
-    return {"summary": summary}
+    except Exception as e:
+        print(f"Error scraping website: {str(e)}")
+        return ""
 
-def extract_tags_node(state: State):
+async def scrape_many(urls: List[str], save_to_disk: bool = False, out_dir: str = ".") -> List[str]:
     """
-    Extract popular tags from the content.
+    Scrape several websites concurrently over one pooled client.
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Analyze the following content and extract 5-7 most relevant tags that represent the main topics.
-        Return the tags as a comma-separated list.
-        
-        Content: {content}
-        
-        Tags:"""
-    )
-    
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    tags = llm.invoke([message]).content.strip().split(", ")
-    return {"tags": tags}
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    limits = httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS)
+    pending_writes = set()
+    async with httpx.AsyncClient(headers=HEADERS, follow_redirects=True, limits=limits) as client:
+        async def scrape(url: str) -> str:
+            async with semaphore:
+                return await scrape_website_async(url, client, save_to_disk, out_dir, pending_writes)
+
+        contents = await asyncio.gather(*(scrape(url) for url in urls))
+
+    # File writes overlap with the other fetches, but finish before returning
+    await asyncio.gather(*pending_writes)
+    return contents
 
-def suggest_topics_node(state: State):
+class AnalysisSchema(BaseModel):
     """
-    Suggest related topics for further research.
+    Structured result of the combined content analysis.
     """
-    prompt = PromptTemplate(
-        input_variables=["content", "tags"],
-        template="""Based on the following content and its tags, suggest 3-5 related topics that would be interesting to explore further.
-        Return the topics as a comma-separated list.
-        
-        Content: {content}
-        Tags: {tags}
-        
-        Related Topics:"""
-    )
-    
-    message = HumanMessage(content=prompt.format(
-        content=state["scraped_content"],
-        tags=", ".join(state["tags"])
-    ))
-    topics = llm.invoke([message]).content.strip().split(", ")
-    return {"related_topics": topics}
+    classification: str = Field(description="One of: Technology, Business, Science, Health, Entertainment, Education, or Other")
+    summary: str = Field(description="A concise 2-3 sentence summary of the content")
+    tags: List[str] = Field(description="5-7 most relevant tags that represent the main topics")
+    sentiment: str = Field(description="Format: Score: [number from -1 to 1], Explanation: [text]")
+    key_phrases: List[str] = Field(description='3-5 entries formatted as "Phrase: [text] - Context: [explanation]"')
+    readability: str = Field(description="Readability score (1-10, where 10 is most complex), suggested target audience and a brief explanation of the complexity level")
+    facts_to_verify: List[str] = Field(description="3-5 key facts or claims, each with the statement, why it might need verification and suggested sources to verify")
+    structure: str = Field(description="The main sections/topics, the logical flow of the content and suggestions for better organization (if any)")
 
-def sentiment_analysis_node(state: State):
+class TopicsSchema(BaseModel):
     """
-    Analyze the sentiment of the content.
+    Structured result of the related topics suggestion.
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Analyze the sentiment of the following content. 
-        Provide a sentiment score from -1 (very negative) to 1 (very positive) and a brief explanation.
-        Format: Score: [number], Explanation: [text]
-        
-        Content: {content}
-        
-        Sentiment Analysis:"""
-    )
-    
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    sentiment = llm.invoke([message]).content.strip()
-    return {"sentiment": sentiment}
+    related_topics: List[str] = Field(description="3-5 related topics that would be interesting to explore further")
+
+# Both structured calls bind the same tool list and only differ in which tool
+# they force. Tool definitions are rendered ahead of the messages, so sharing
+# them keeps the tools, system prompt and content block an identical leading
+# prefix that Groq's automatic prompt caching can reuse on the topics call.
+# Built once since binding converts the schemas to tool definitions.
+ANALYSIS_TOOLS = [AnalysisSchema, TopicsSchema]
+analysis_llm = llm.bind_tools(ANALYSIS_TOOLS, tool_choice="AnalysisSchema") | PydanticToolsParser(tools=ANALYSIS_TOOLS, first_tool_only=True)
+topics_llm = llm.bind_tools(ANALYSIS_TOOLS, tool_choice="TopicsSchema") | PydanticToolsParser(tools=ANALYSIS_TOOLS, first_tool_only=True)
+
+# Shared system prompt for every LLM call
+STATIC_INSTRUCTIONS = """You are a content analysis assistant. You will be given scraped web content
+inside <content> tags, followed by a task. The possible tasks are:
+
+analyze: perform all of these analyses on the content:
+1. Classification: classify it into one of these categories: Technology, Business, Science, Health, Entertainment, Education, or Other.
+2. Summary: provide a concise summary in 2-3 sentences.
+3. Tags: extract 5-7 most relevant tags that represent the main topics.
+4. Sentiment: provide a sentiment score from -1 (very negative) to 1 (very positive) and a brief explanation.
+5. Key phrases: extract 3-5 key phrases or important quotes, each with a brief context of why it's important.
+6. Readability: give a readability score (1-10, where 10 is most complex), the suggested target audience and a brief explanation of the complexity level.
+7. Facts to verify: identify 3-5 key facts or claims that might need verification, why, and suggested sources to verify.
+8. Structure: describe the main sections/topics, the logical flow and suggestions for better organization (if any).
+
+related_topics: based on the content and the given tags, suggest 3-5 related topics that would be
+interesting to explore further.
+
+condense: the content is one part of a longer page. Rewrite it as compact notes that keep its main
+topics, section structure, notable quotes, claims and facts. Return only the notes."""
+
+# Token budget for the content sent to the analysis prompts
+MAX_CONTENT_TOKENS = 4000
 
-def key_phrases_node(state: State):
+# Size in characters of the chunks condensed separately for long pages
+CHUNK_SIZE = 8000
+
+# Maximum number of map/reduce rounds used to condense a long page
+MAX_CONDENSE_ROUNDS = 4
+
+# Maximum number of LLM requests a batch keeps in flight
+MAX_LLM_CONCURRENCY = 8
+
+# Maximum number of pages run_agent analyzes at the same time
+MAX_CONCURRENT_ANALYSES = 4
+
+def _count_tokens(text: str) -> int:
     """
-    Extract key phrases and important quotes from the content.
+    Count tokens with tiktoken, or estimate them from the length if it isn't installed.
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Extract 3-5 key phrases or important quotes from the following content.
-        For each phrase/quote, provide a brief context of why it's important.
-        Format each entry as: "Phrase: [text] - Context: [explanation]"
-        
-        Content: {content}
-        
-        Key Phrases:"""
-    )
-    
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    key_phrases = llm.invoke([message]).content.strip().split("\n")
-    return {"key_phrases": key_phrases}
+    if tiktoken is None:
+        return len(text) // 4
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
 
-def readability_score_node(state: State):
+def _truncate(text: str, max_tokens: int = MAX_CONTENT_TOKENS) -> str:
     """
-    Calculate the readability score and suggest the target audience.
+    Cut text down to at most max_tokens tokens.
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Analyze the readability of the following content.
-        Provide:
-        1. A readability score (1-10, where 10 is most complex)
-        2. The suggested target audience (e.g., "General Public", "Academic", "Technical")
-        3. Brief explanation of the complexity level
-        
-        Content: {content}
-        
-        Readability Analysis:"""
-    )
-    
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    readability = llm.invoke([message]).content.strip()
-    return {"readability": readability}
+    if tiktoken is None:
+        return text[:max_tokens * 4]
+    encoding = tiktoken.get_encoding("cl100k_base")
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
 
-def fact_check_node(state: State):
+def _split_long_line(line: str, chunk_size: int) -> List[str]:
     """
-    Identify potential facts and claims that need verification.
+    Split a line longer than chunk_size into pieces, preferring to break at spaces.
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Identify 3-5 key facts or claims from the following content that might need verification.
-        For each fact/claim, provide:
-        1. The statement
-        2. Why it might need verification
-        3. Suggested sources to verify
-        
-        Content: {content}
-        
-        Facts to Verify:"""
-    )
-    
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    facts_to_verify = llm.invoke([message]).content.strip().split("\n")
-    return {"facts_to_verify": facts_to_verify}
+    pieces = []
+    while len(line) > chunk_size:
+        cut = line.rfind(" ", 0, chunk_size)
+        if cut <= 0:
+            cut = chunk_size
+        pieces.append(line[:cut])
+        line = line[cut:].lstrip()
+    pieces.append(line)
+    return pieces
 
-def content_structure_node(state: State):
+def _split_chunks(text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
     """
-    Analyze the structure and organization of the content.
+    Split text into chunks of at most chunk_size characters, on line boundaries
+    where possible; lines that are longer on their own get split too.
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template="""Analyze the structure and organization of the following content.
-        Provide:
-        1. The main sections/topics
-        2. The logical flow of the content
-        3. Suggestions for better organization (if any)
-        
-        Content: {content}
-        
-        Structure Analysis:"""
-    )
-    
-    message = HumanMessage(content=prompt.format(content=state["scraped_content"]))
-    structure = llm.invoke([message]).content.strip()
-    return {"structure": structure}
+    chunks = []
+    current = []
+    size = 0
+    for line in text.splitlines():
+        for piece in _split_long_line(line, chunk_size):
+            if current and size + len(piece) > chunk_size:
+                chunks.append("\n".join(current))
+                current = []
+                size = 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+# Built once and shared by every call instead of being recreated per request
+SYSTEM_MESSAGE = SystemMessage(content=STATIC_INSTRUCTIONS)
+
+def build_messages(content: str, task: str):
+    """
+    Build the messages for a task, keeping the static instructions and the content first.
+    """
+    return [
+        SYSTEM_MESSAGE,
+        HumanMessage(content=f"<content>{content}</content>\n\n{task}")
+    ]
+
+async def _condense(text: str) -> str:
+    """
+    Condense every chunk of text concurrently and join the notes.
+    """
+    messages = [build_messages(chunk, "Task: condense") for chunk in _split_chunks(text)]
+    notes = await llm.abatch(messages, config={"max_concurrency": MAX_LLM_CONCURRENCY})
+    return "\n".join(note.content.strip() for note in notes)
+
+async def condense_content_node(state: State):
+    """
+    Fit the content into the token budget, condensing long pages chunk by chunk.
+    """
+    content = state["scraped_content"]
+    tokens = _count_tokens(content)
+
+    # Map: condense the chunks, reduce: condense the joined notes again
+    # until they fit, so the end of long pages still reaches the analysis
+    for _ in range(MAX_CONDENSE_ROUNDS):
+        if tokens <= MAX_CONTENT_TOKENS:
+            break
+        condensed = await _condense(content)
+        condensed_tokens = _count_tokens(condensed)
+        # Stop if the notes didn't get any shorter
+        if condensed_tokens >= tokens:
+            break
+        content, tokens = condensed, condensed_tokens
+
+    # Truncate only as a last resort
+    return {"analysis_content": _truncate(content)}
+
+async def analyze_all_node(state: State):
+    """
+    Run every content analysis in a single structured LLM call.
+    """
+    messages = build_messages(state["analysis_content"], "Task: analyze")
+    analysis = await analysis_llm.ainvoke(messages)
+    # The parser returns None when the model answers without calling the tool
+    if analysis is None:
+        raise ValueError("The model did not return a structured analysis")
+    return analysis.model_dump()
+
+async def suggest_topics_node(state: State):
+    """
+    Suggest related topics for further research.
+    """
+    messages = build_messages(state["analysis_content"], f"Tags: {', '.join(state['tags'])}\n\nTask: related_topics")
+    topics = await topics_llm.ainvoke(messages)
+    # The parser returns None when the model answers without calling the tool
+    if topics is None:
+        return {"related_topics": []}
+    return topics.model_dump()
+
+# Embedding model used by the semantic cache
+EMBEDDING_MODEL = "BAAI/bge-small-en"
+
+# Size in characters of the chunks embedded by the semantic cache, kept under
+# the embedding model's 512 token input limit so no text is silently dropped
+EMBED_CHUNK_SIZE = 2000
+
+def _analysis_version() -> str:
+    """
+    Hash of everything that shapes an analysis or its embedding, so results and
+    vectors from other prompts, schemas or embedding settings aren't mixed.
+    """
+    key = json.dumps([
+        llm.model_name,
+        EMBEDDING_MODEL,
+        EMBED_CHUNK_SIZE,
+        STATIC_INSTRUCTIONS,
+        MAX_CONTENT_TOKENS,
+        [tool.model_json_schema() for tool in ANALYSIS_TOOLS]
+    ], sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+class SemanticCache:
+    """
+    Cache finished analyses by embedding similarity of the scraped content,
+    so near-duplicate pages (mirrors, reprints, new revisions) skip the LLM calls.
+    Every analysis version gets its own index under path.
+    """
+    def __init__(self, path: str = ".semantic_cache", version: str = "", threshold: float = 0.92):
+        self.path = os.path.join(path, version) if version else path
+        self.threshold = threshold
+        self.embeddings = None
+        self.index = None
+        self.results = []
+        # lookup and add run in worker threads, so guard the model and the index
+        self.lock = threading.Lock()
+
+        # Load a previously persisted index
+        index_file = os.path.join(self.path, "index.faiss")
+        results_file = os.path.join(self.path, "results.json")
+        if os.path.exists(index_file) and os.path.exists(results_file):
+            self.index = faiss.read_index(index_file)
+            with open(results_file, 'r', encoding='utf-8') as f:
+                self.results = json.load(f)
+
+    def _embed(self, text: str) -> np.ndarray:
+        # The embedding model is only loaded the first time it is needed
+        with self.lock:
+            if self.embeddings is None:
+                self.embeddings = HuggingFaceEmbeddings(
+                    model_name=EMBEDDING_MODEL,
+                    encode_kwargs={"normalize_embeddings": True}
+                )
+
+        # Average the embeddings of the whole page rather than only its first
+        # 512 tokens, which are mostly navigation on sites like Wikipedia
+        vectors = np.array(self.embeddings.embed_documents(_split_chunks(text, EMBED_CHUNK_SIZE)), dtype="float32")
+        mean = vectors.mean(axis=0)
+        return (mean / np.linalg.norm(mean)).reshape(1, -1)
+
+    def lookup(self, text: str):
+        """
+        Return the cached analysis of the most similar content, or None below the threshold.
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return None
+        embedding = self._embed(text)
+        with self.lock:
+            # Embeddings are normalized, so the inner product is the cosine similarity
+            scores, ids = self.index.search(embedding, 1)
+            if scores[0][0] < self.threshold:
+                return None
+            return self.results[ids[0][0]]
+
+    def add(self, text: str, result: dict):
+        """
+        Store an analysis and persist the index to disk.
+        """
+        embedding = self._embed(text)
+        with self.lock:
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(embedding.shape[1])
+            self.index.add(embedding)
+            self.results.append({
+                key: value for key, value in result.items()
+                if key not in ("scraped_content", "analysis_content")
+            })
+
+            os.makedirs(self.path, exist_ok=True)
+            faiss.write_index(self.index, os.path.join(self.path, "index.faiss"))
+            with open(os.path.join(self.path, "results.json"), 'w', encoding='utf-8') as f:
+                json.dump(self.results, f)
+
+semantic_cache = SemanticCache(version=_analysis_version())
 
 # Create and configure the workflow
 workflow = StateGraph(State)
 
 # Add nodes to the graph
-workflow.add_node("classify_content", classification_node)
-workflow.add_node("summarize_content", summarize_node)
-workflow.add_node("extract_content_tags", extract_tags_node)
+workflow.add_node("condense_content", condense_content_node)
+workflow.add_node("analyze_all", analyze_all_node)
 workflow.add_node("suggest_related_topics", suggest_topics_node)
-workflow.add_node("analyze_sentiment", sentiment_analysis_node)
-workflow.add_node("extract_key_phrases", key_phrases_node)
-workflow.add_node("analyze_readability", readability_score_node)
-workflow.add_node("check_facts", fact_check_node)
-workflow.add_node("analyze_structure", content_structure_node)
 
 # Add edges to the graph
-workflow.set_entry_point("classify_content")
-workflow.add_edge("classify_content", "summarize_content")
-workflow.add_edge("summarize_content", "extract_content_tags")
-workflow.add_edge("extract_content_tags", "suggest_related_topics")
-workflow.add_edge("suggest_related_topics", "analyze_sentiment")
-workflow.add_edge("analyze_sentiment", "extract_key_phrases")
-workflow.add_edge("extract_key_phrases", "analyze_readability")
-workflow.add_edge("analyze_readability", "check_facts")
-workflow.add_edge("check_facts", "analyze_structure")
-workflow.add_edge("analyze_structure", END)
+workflow.set_entry_point("condense_content")
+workflow.add_edge("condense_content", "analyze_all")
+workflow.add_edge("analyze_all", "suggest_related_topics")
+workflow.add_edge("suggest_related_topics", END)
 
 # Compile the graph
 app = workflow.compile()
 
+async def analyze_content(url: str, scraped_content: str):
+    """
+    Analyze scraped content, reusing the analysis of a near-duplicate page when available.
+    """
+    if not scraped_content:
+        return None
+
+    # Embedding is CPU-bound, so keep it off the event loop
+    cached = await asyncio.to_thread(semantic_cache.lookup, scraped_content)
+    if cached is not None:
+        return {**cached, "url": url, "scraped_content": scraped_content}
+
+    result = await app.ainvoke({
+        "url": url,
+        "scraped_content": scraped_content
+    })
+    await asyncio.to_thread(semantic_cache.add, scraped_content, result)
+    return result
+
+async def run_agent(urls: List[str], save_to_disk: bool = False, out_dir: str = "."):
+    """
+    Scrape every URL concurrently and analyze each page.
+    """
+    contents = await scrape_many(urls, save_to_disk, out_dir)
+
+    # Limit how many pages are analyzed at once, so at most
+    # MAX_CONCURRENT_ANALYSES * MAX_LLM_CONCURRENCY LLM requests are in flight
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+
+    async def analyze(url: str, scraped_content: str):
+        # A failing page shouldn't discard the results of the others
+        try:
+            async with semaphore:
+                return await analyze_content(url, scraped_content)
+        except Exception as e:
+            print(f"Error analyzing {url}: {str(e)}")
+            return None
+
+    return await asyncio.gather(*(
+        analyze(url, scraped_content) for url, scraped_content in zip(urls, contents)
+    ))
+
 # Test the agent
 if __name__ == "__main__":
-    test_url = "https://en.wikipedia.org/wiki/JoJo%27s_Bizarre_Adventure"  # Replace with your test URL
-    scraped_content = scrape_website(test_url)
+    # Pass URLs on the command line, or fall back to the test URL
+    test_urls = sys.argv[1:] or ["https://en.wikipedia.org/wiki/JoJo%27s_Bizarre_Adventure"]
+    results = asyncio.run(run_agent(test_urls))
     
-    if scraped_content:
-        result = app.invoke({
-            "url": test_url,
-            "scraped_content": scraped_content
-        })
-        
+    for result in results:
+        if not result:
+            continue
+        print(f"\n===== {result['url']} =====")
         print("\nClassification:", result["classification"])
         print("\nSummary:", result["summary"])
         print("\nTags:", result["tags"])
@@ -300,4 +551,4 @@ if __name__ == "__main__":
         print("\nFacts to Verify:")
         for fact in result["facts_to_verify"]:
             print(f"- {fact}")
-        print("\nContent Structure:", result["structure"]) 
\ No newline at end of file
+        print("\nContent Structure:", result["structure"])
\ No newline at end of file